@@ -1,8 +1,17 @@
-import requests
-import feedparser
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+import asyncio
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+import diskcache
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from email.utils import parsedate_to_datetime
+import calendar
+import functools
+import re
+import threading
+from typing import Callable, List, Dict, Optional
+from datetime import datetime, timedelta, timezone
 import logging
 
 # Imports Interface
@@ -18,6 +27,14 @@ from sentiment_analyzer import SentimentAnalyzer
 
 logger = logging.getLogger(__name__)
 
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
+RSS1_NS = "{http://purl.org/rss/1.0/}"
+WHITESPACE_RE = re.compile(r"\s+")
+# Encodage d'une déclaration <?xml ... encoding="..."?> en tête de page XHTML
+XML_ENCODING_RE = re.compile(rb"""^\s*<\?xml[^>]*?encoding=["']([A-Za-z0-9._-]+)["']""")
+
 # ============================================================
 #                 STRUCTURE DES DONNÉES
 # ============================================================
@@ -29,7 +46,7 @@ class ArticleData:
         url: str,
         source: str,
         topic: str,
-        published_date: Optional[datetime] = None,
+        published_ts: int = 0,
         text: Optional[str] = None,
         # Champs pour le sentiment
         sentiment_score: float = 0.0,
@@ -39,11 +56,18 @@ class ArticleData:
         self.url = url
         self.source = source
         self.topic = topic
-        self.published_date = published_date or datetime.now()
+        self.published_ts = published_ts  # secondes depuis l'epoch (UTC), 0 si inconnue
         self.text = text or ""
         self.sentiment_score = sentiment_score
         self.sentiment_label = sentiment_label
 
+    @property
+    def published_date(self) -> Optional[datetime]:
+        """Date de publication (UTC naïf), construite seulement à l'affichage."""
+        if not self.published_ts:
+            return None
+        return datetime.fromtimestamp(self.published_ts, timezone.utc).replace(tzinfo=None)
+
 # ============================================================
 #                      SCRAPER RSS
 # ============================================================
@@ -68,68 +92,312 @@ class RSSScraper:
         },
     }
 
-    def __init__(self, max_articles_per_topic: int = 3):
+    TEXT_CACHE_TTL = 7 * 24 * 3600  # secondes
+    EMPTY_TEXT_CACHE_TTL = 15 * 60  # secondes
+    # Au-delà de cette longueur, le contenu embarqué dans le flux suffit : pas de téléchargement
+    INLINE_TEXT_MIN = 400
+    # En dessous (titre + description), l'entrée est trop maigre : ni téléchargement ni analyse
+    PREVIEW_MIN = 30
+    # Le début de la page suffit pour trouver le contenu de l'article
+    MAX_HTML_BYTES = 256 * 1024
+
+    def __init__(
+        self,
+        max_articles_per_topic: int = 3,
+        text_cache_dir: str = "./.article_cache",
+        max_concurrency: int = 16,
+        parse_workers: int = 4,
+    ):
         self.max_articles_per_topic = max_articles_per_topic
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": "BotActu/1.0"})
-        
+        self.max_concurrency = max_concurrency
+        self.parse_workers = parse_workers
+        # Client HTTP asynchrone, sémaphore et pool de parsing : créés pour chaque scrape_all
+        self.session: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Sélecteurs génériques compilés une seule fois, par ordre de priorité
+        self._selectors = [
+            CSSSelector(s) for s in ("article", "main", "div.content", "div.post-content", "div#content")
+        ]
+        # Un parser HTML réutilisé par thread du pool (les parsers lxml ne se partagent pas entre threads)
+        self._local = threading.local()
+
+        # Cache persistant URL -> texte, pour ne pas re-télécharger/re-parser un article déjà vu
+        self.text_cache = diskcache.Cache(text_cache_dir)
+
         # Instanciation de l'analyzer importé
         self.analyzer = SentimentAnalyzer()
 
-    def fetch_article_text(self, url: str) -> str:
+    async def _fetch(self, url: str) -> httpx.Response:
+        """GET asynchrone, borné par le sémaphore pour ne pas saturer le réseau."""
+        async with self._semaphore:
+            r = await self.session.get(url)
+            r.raise_for_status()
+            return r
+
+    async def _fetch_html(self, url: str) -> tuple[bytes, Optional[str]]:
+        """
+        GET en streaming d'une page HTML, tronqué à MAX_HTML_BYTES.
+        Retourne les octets bruts et le charset annoncé par l'en-tête (None s'il est absent) ;
+        le décodage est laissé à lxml, qui sait lire une déclaration <?xml encoding=...?>.
+        Retourne b"" (sans lire le corps) si la réponse n'est pas du HTML.
+        """
+        async with self._semaphore:
+            async with self.session.stream("GET", url) as r:
+                r.raise_for_status()
+                ctype = r.headers.get("content-type", "")
+                if "text/html" not in ctype and "application/xhtml+xml" not in ctype:
+                    return b"", None
+                buf = bytearray()
+                async for chunk in r.aiter_bytes(65536):
+                    buf += chunk
+                    if len(buf) > self.MAX_HTML_BYTES:
+                        break
+                return bytes(buf), r.charset_encoding
+
+    @staticmethod
+    def _parse_ts(value: Optional[str]) -> int:
+        """Date RSS (RFC 822) ou Atom (ISO 8601) -> secondes depuis l'epoch (0 si absente)."""
+        if not value:
+            return 0
+        value = value.strip()
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            try:
+                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return 0
+        # Une date sans fuseau est considérée comme UTC
+        return calendar.timegm(dt.utctimetuple())
+
+    @classmethod
+    def _parse_rss(cls, xml_bytes: bytes) -> List[dict]:
+        """
+        Extrait les entrées d'un flux RSS 2.0, RSS 1.0 (RDF) ou Atom.
+        Chaque entrée : {"title", "link", "published", "description", "content"}.
+        Un flux mal formé est relu en mode tolérant plutôt que d'être écarté.
+        """
+        # Flux distant non fiable : ni entités externes, ni accès réseau pendant le parsing
+        try:
+            root = etree.fromstring(
+                xml_bytes, etree.XMLParser(resolve_entities=False, no_network=True)
+            )
+        except etree.XMLSyntaxError:
+            root = etree.fromstring(
+                xml_bytes, etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+            )
+        if root is None:
+            return []
+        entries = []
+
+        # RSS 2.0 (sans espace de noms) et RSS 1.0 (mêmes champs, dans l'espace RSS1_NS).
+        # Les flux SPIP datent leurs items avec dc:date plutôt que pubDate.
+        for ns in ("", RSS1_NS):
+            for item in root.iterfind(f".//{ns}item"):
+                entries.append({
+                    "title": (item.findtext(f"{ns}title") or "").strip(),
+                    "link": (item.findtext(f"{ns}link") or "").strip(),
+                    "published": cls._parse_ts(
+                        item.findtext("pubDate") or item.findtext(f"{DC_NS}date")
+                    ),
+                    "description": (item.findtext(f"{ns}description") or "").strip(),
+                    "content": (item.findtext(f"{CONTENT_NS}encoded") or "").strip(),
+                })
+
+        for item in root.iterfind(f".//{ATOM_NS}entry"):
+            link = ""
+            for el in item.iterfind(f"{ATOM_NS}link"):
+                if el.get("rel", "alternate") == "alternate":
+                    link = el.get("href", "")
+                    break
+            entries.append({
+                "title": (item.findtext(f"{ATOM_NS}title") or "").strip(),
+                "link": link.strip(),
+                "published": cls._parse_ts(
+                    item.findtext(f"{ATOM_NS}published") or item.findtext(f"{ATOM_NS}updated")
+                ),
+                "description": (item.findtext(f"{ATOM_NS}summary") or "").strip(),
+                "content": (item.findtext(f"{ATOM_NS}content") or "").strip(),
+            })
+
+        return entries
+
+    async def _fetch_feed(self, feed_url: str) -> Optional[List[dict]]:
+        """Télécharge et parse un flux ; None s'il est injoignable ou invalide."""
+        try:
+            resp = await self._fetch(feed_url)
+            return await self._in_executor(self._parse_rss, resp.content)
+        except Exception:
+            return None
+
+    async def _in_executor(self, func, *args):
+        """Exécute un parsing (CPU) dans le pool de threads pour ne pas bloquer la boucle réseau."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _text_of(el) -> str:
+        """Texte d'un élément, nœuds séparés par une espace (sans scripts ni styles)."""
+        etree.strip_elements(el, "script", "style", with_tail=False)
+        return WHITESPACE_RE.sub(" ", " ".join(el.itertext())).strip()
+
+    def _html_parser(self, encoding: Optional[str] = None) -> lxml.html.HTMLParser:
+        """Parser du thread courant pour cet encodage (None : détection par lxml)."""
+        parsers = getattr(self._local, "parsers", None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        parser = parsers.get(encoding)
+        if parser is None:
+            try:
+                parser = lxml.html.HTMLParser(encoding=encoding)
+            except LookupError:
+                # Charset inconnu annoncé par le serveur : on laisse lxml détecter
+                return self._html_parser()
+            parsers[encoding] = parser
+        return parser
+
+    def _extract_text(self, html: bytes, encoding: Optional[str] = None) -> str:
+        # Le parser HTML de lxml ignore la déclaration XML : on la lit nous-mêmes
+        # quand l'en-tête HTTP n'annonce pas de charset.
+        if encoding is None:
+            declared = XML_ENCODING_RE.match(html)
+            if declared:
+                encoding = declared.group(1).decode("ascii")
+        doc = lxml.html.fromstring(html, parser=self._html_parser(encoding))
+        for sel in self._selectors:
+            hits = sel(doc)
+            if hits:
+                return self._text_of(hits[0])
+        return ""
+
+    def _strip_tags(self, fragment: str) -> str:
+        return self._text_of(
+            lxml.html.fragment_fromstring(fragment, create_parent="div", parser=self._html_parser())
+        )
+
+    async def fetch_article_text(self, url: str) -> str:
         """Récupère le texte brut si possible."""
+        # diskcache repose sur SQLite (appels bloquants) : hors de la boucle d'événements
+        cached = await self._in_executor(self.text_cache.get, url)
+        if cached is not None:
+            return cached
+
         try:
-            r = self.session.get(url, timeout=4)
-            r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-            # Sélecteurs génériques
-            tags = ["article", "main", "div.content", "div.post-content", "div#content"]
-            for t in tags:
-                content = soup.select_one(t)
-                if content:
-                    return content.get_text(" ", strip=True)
-            return ""
+            html, encoding = await self._fetch_html(url)
+            text = await self._in_executor(self._extract_text, html, encoding) if html else ""
         except Exception:
+            # Pas de mise en cache : on retentera au prochain passage
             return ""
 
-    def scrape_topic(self, topic: str) -> List[ArticleData]:
-        articles = []
+        # Un texte vide (mauvais Content-Type, sélecteurs sans résultat) peut être passager :
+        # on ne le garde que le temps d'une exécution.
+        expire = self.TEXT_CACHE_TTL if text else self.EMPTY_TEXT_CACHE_TTL
+        await self._in_executor(functools.partial(self.text_cache.set, url, text, expire=expire))
+        return text
+
+    async def _entry_text(self, entry: dict) -> Optional[str]:
+        """
+        Texte de l'article : celui embarqué dans le flux s'il est assez long, sinon la page.
+        None si l'entrée est trop maigre pour mériter un téléchargement.
+        """
+        preview = f"{entry['title']} {entry['description']}"
+        if not entry["content"] and len(preview.strip()) < self.PREVIEW_MIN:
+            return None
+
+        inline = entry["content"] or entry["description"]
+        if inline:
+            inline_text = await self._in_executor(self._strip_tags, inline)
+            if len(inline_text) > self.INLINE_TEXT_MIN:
+                return inline_text
+        return await self.fetch_article_text(entry["link"])
+
+    async def _collect_topic(self, topic: str) -> list:
+        """Récupère les flux d'un sujet puis le texte des articles retenus, en parallèle."""
         feeds = self.RSS_FEEDS.get(topic, {})
-        
-        for feed_name, feed_url in feeds.items():
-            feed = feedparser.parse(feed_url)
-            if feed.bozo: continue
-
-            for entry in feed.entries:
-                if len(articles) >= self.max_articles_per_topic: break
-                
-                try:
-                    title = entry.title
-                    link = entry.link
-                    published = None
-                    if hasattr(entry, "published_parsed") and entry.published_parsed:
-                        published = datetime(*entry.published_parsed[:6])
-
-                    # 1. Récupération du texte
-                    full_text = self.fetch_article_text(link)
-                    
-                    # 2. Préparation du texte à analyser (fallback sur titre si texte vide)
-                    text_to_analyze = full_text if len(full_text) > 100 else f"{title} {entry.get('description', '')}"
-                    
-                    # 3. Appel au module d'analyse externe
-                    score, label = self.analyzer.analyze(text_to_analyze)
-
-                    articles.append(ArticleData(
-                        title=title, url=link, source=feed_name, topic=topic,
-                        published_date=published, text=full_text,
-                        sentiment_score=score, sentiment_label=label
-                    ))
-                except Exception:
-                    continue
-                    
-            if len(articles) >= self.max_articles_per_topic: break
-            
-        return articles
+
+        # Tous les flux du sujet sont téléchargés et parsés en parallèle
+        parsed = await asyncio.gather(*(self._fetch_feed(feed_url) for feed_url in feeds.values()))
+
+        entries_kept = []
+        for feed_name, entries in zip(feeds, parsed):
+            if entries is None: continue
+
+            for entry in entries:
+                if len(entries_kept) >= self.max_articles_per_topic: break
+                if not entry["title"] or not entry["link"]: continue
+
+                entries_kept.append((feed_name, entry))
+
+            if len(entries_kept) >= self.max_articles_per_topic: break
+
+        # Tous les articles du sujet sont récupérés en même temps
+        full_texts = await asyncio.gather(*(self._entry_text(entry) for _, entry in entries_kept))
+
+        rows = []
+        for (feed_name, entry), full_text in zip(entries_kept, full_texts):
+            title = entry["title"]
+            if full_text is None:
+                # Texte vide : analyze_batch le classe "neutre" sans appeler le modèle
+                full_text = text_to_analyze = ""
+            else:
+                # Texte à analyser (fallback sur titre si texte vide)
+                text_to_analyze = full_text if len(full_text) > 100 else f"{title} {entry['description']}"
+            rows.append((title, entry["link"], feed_name, entry["published"], full_text, text_to_analyze))
+        return rows
+
+    async def scrape_all(
+        self,
+        topics: List[str],
+        on_topic_done: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, List[ArticleData]]:
+        """
+        Scrape tous les sujets en parallèle, puis analyse tous les textes en un seul lot.
+        `on_topic_done` est appelé dès que les articles d'un sujet sont récupérés.
+        """
+        async def collect(topic: str) -> list:
+            rows = await self._collect_topic(topic)
+            if on_topic_done:
+                on_topic_done(topic)
+            return rows
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=self.parse_workers) as self._executor:
+            # HTTP/2 + pool de connexions persistantes : TLS négocié une fois par hôte
+            async with httpx.AsyncClient(
+                http2=True, timeout=4.0, follow_redirects=True,
+                headers={"User-Agent": "BotActu/1.0"},
+                limits=httpx.Limits(max_keepalive_connections=32),
+            ) as self.session:
+                per_topic = await asyncio.gather(*(collect(t) for t in topics))
+
+        # Un seul appel au module d'analyse externe pour tous les sujets
+        texts = [row[5] for rows in per_topic for row in rows]
+        scores, labels = self.analyzer.analyze_batch(texts)
+
+        results = {}
+        i = 0
+        for topic, rows in zip(topics, per_topic):
+            results[topic] = []
+            for title, link, feed_name, published_ts, full_text, _ in rows:
+                results[topic].append(ArticleData(
+                    title=title, url=link, source=feed_name, topic=topic,
+                    published_ts=published_ts, text=full_text,
+                    sentiment_score=scores[i], sentiment_label=labels[i]
+                ))
+                i += 1
+        return results
+
+    def scrape(
+        self,
+        topics: List[str],
+        on_topic_done: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, List[ArticleData]]:
+        """Point d'entrée synchrone de `scrape_all`."""
+        return asyncio.run(self.scrape_all(topics, on_topic_done))
+
+    def scrape_topic(self, topic: str) -> List[ArticleData]:
+        return self.scrape([topic])[topic]
 
 # ============================================================
 #              INTERFACE UTILISATEUR (MAIN)
@@ -155,11 +423,15 @@ if __name__ == "__main__":
         console=console,
         transient=True
     ) as progress:
-        task = progress.add_task("Analyse...", total=len(topics))
-        for topic in topics:
-            progress.update(task, description=f"Analyse du sujet : [bold]{topic.upper()}[/]")
-            results[topic] = scraper.scrape_topic(topic)
+        task = progress.add_task("Récupération des articles...", total=len(topics))
+
+        def topic_done(topic: str) -> None:
+            progress.update(task, description=f"Sujet récupéré : [bold]{topic.upper()}[/]")
             progress.advance(task)
+            if progress.tasks[task].finished:
+                progress.update(task, description="Analyse du sentiment...")
+
+        results = scraper.scrape(topics, on_topic_done=topic_done)
 
     # --- Affichage Tableau ---
     console.print("\n")
@@ -183,7 +455,11 @@ if __name__ == "__main__":
             else:
                 mood = f"⚪ [dim]Neutre[/]\n[dim]{a.sentiment_score:.2f}[/]"
 
-            table.add_row(mood, f"[bold]{a.title}[/]\n[italic green]{a.source}[/]", f"[link={a.url}]Voir ↗[/]")
+            source = f"[italic green]{a.source}[/]"
+            if a.published_ts:
+                source += f" [dim]· {a.published_date:%d/%m/%Y %H:%M} UTC[/]"
+
+            table.add_row(mood, f"[bold]{a.title}[/]\n{source}", f"[link={a.url}]Voir ↗[/]")
 
         console.print(table)
         console.print("\n")
\ No newline at end of file
@@ -1,25 +1,161 @@
 """
-Module d'analyse de sentiment basé sur Hugging Face Transformers (BERT).
+Module d'analyse de sentiment basé sur Hugging Face Transformers (DistilBERT).
 Plus lent que TextBlob, mais beaucoup plus intelligent pour le contexte.
 """
-from transformers import pipeline
+import os
+
+# Threads BLAS/OpenMP fixés explicitement pour éviter la sur-souscription. Les runtimes
+# OpenMP/MKL ne lisent ces variables qu'à leur initialisation : avant d'importer torch.
+# L'inférence tourne seule, après le scraping (le pool de parsing du scraper est alors
+# fermé) : la moitié des cœurs pour les opérations internes suffit.
+INTRA_OP_THREADS = max(1, (os.cpu_count() or 1) // 2)
+os.environ.setdefault("OMP_NUM_THREADS", str(INTRA_OP_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(INTRA_OP_THREADS))
+
+from pathlib import Path
+from transformers import AutoTokenizer, pipeline
+import diskcache
+import hashlib
+import numpy as np
+import torch
 import logging
 
 # On réduit le bruit des logs de transformers
 logging.getLogger("transformers").setLevel(logging.ERROR)
 
+MODEL_NAME = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+# Export ONNX produit une fois pour toutes par scripts/export_sentiment_onnx.py
+ONNX_DIR = Path(__file__).resolve().parents[2] / "sentiment_onnx"
+
+# Label du modèle -> (polarité, label textuel pour l'interface)
+POLARITY = {
+    "negative": (-1.0, "négatif"),
+    "neutral": (0.0, "neutre"),
+    "positive": (1.0, "positif"),
+}
+
 class SentimentAnalyzer:
     """
-    Utilise un modèle BERT multilingue pour classer le sentiment.
-    Le modèle retourne un score en 'étoiles' (1 star à 5 stars).
+    Utilise un modèle DistilBERT multilingue (distillé) pour classer le sentiment.
+    Le modèle retourne directement 'positive', 'neutral' ou 'negative'.
     """
+
+    MAX_TOKENS = 256
+    BATCH_SIZE = 16
     
-    def __init__(self):
-        print("Chargement du modèle neuronal (cela peut prendre quelques secondes)...")
-        # On utilise un modèle spécialisé qui gère le français, l'anglais, etc.
-        # Il va être téléchargé automatiquement au premier lancement.
-        model_name = "nlptown/bert-base-multilingual-uncased-sentiment"
-        self.pipe = pipeline("sentiment-analysis", model=model_name)
+    def __init__(self, cache_dir: str = "./.sent_cache", onnx_dir: Path = ONNX_DIR):
+        try:
+            torch.set_num_threads(INTRA_OP_THREADS)
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Déjà fixé (second analyzer dans le même processus)
+            pass
+
+        # Cache persistant entre les exécutions : hash du texte -> (score, label)
+        self.cache = diskcache.Cache(cache_dir)
+
+        # Export ONNX disponible (et dépendance optionnelle installée) : démarrage rapide via
+        # onnxruntime, sans construire le modèle PyTorch
+        self.pipe = None
+        if (Path(onnx_dir) / "model.onnx").exists():
+            try:
+                self.pipe = self._load_onnx(Path(onnx_dir))
+            except ImportError as e:
+                print(f"Export ONNX ignoré (optimum[onnxruntime] absent) : {e}")
+        if self.pipe is not None:
+            self.device = self.pipe.model.device
+            self.padding = "longest"
+            self.compiled = False
+        else:
+            print("Chargement du modèle neuronal (cela peut prendre quelques secondes)...")
+            # On utilise un modèle spécialisé qui gère le français, l'anglais, etc.
+            # Il va être téléchargé automatiquement au premier lancement.
+            # GPU en demi-précision si disponible (bfloat16 dès Ampere, float16 dès Volta)
+            self.device, dtype = self._select_device()
+            self.pipe = pipeline(
+                "sentiment-analysis", model=MODEL_NAME, device=self.device, torch_dtype=dtype
+            )
+            self.pipe.model.eval()
+
+            # Quantification dynamique INT8 des couches Linear (l'essentiel du coût de BERT sur CPU).
+            if self.device.type == "cpu":
+                self.pipe.model = torch.quantization.quantize_dynamic(
+                    self.pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+            # Formes fixes pour le graphe compilé (pas de recompilation)
+            self.padding = "max_length"
+            self.compiled = True
+
+            # Compilation du graphe (noyaux fusionnés). La compilation réelle a lieu au premier
+            # appel : on la déclenche ici, et on reste en mode eager si elle échoue.
+            uncompiled = self.pipe.model
+            try:
+                self.pipe.model = torch.compile(uncompiled, mode="reduce-overhead", dynamic=False)
+                self._warm_up()
+            except Exception as e:
+                print(f"torch.compile indisponible, mode eager : {e}")
+                self.pipe.model = uncompiled
+                # En eager, des lots à taille fixe ne feraient que gaspiller du calcul
+                self.padding = "longest"
+                self.compiled = False
+
+        # On tokenise nous-mêmes et on appelle le modèle directement (sans repasser par le pipeline)
+        self.tokenizer = self.pipe.tokenizer
+        self.model = self.pipe.model
+
+        self._weights, self._labels = self._build_tables(self.model.config.id2label)
+
+    @staticmethod
+    def _build_tables(id2label: dict) -> tuple[np.ndarray, np.ndarray]:
+        """Tables classe -> polarité et classe -> label textuel, dans l'ordre des classes du modèle."""
+        polarities = [POLARITY[id2label[i].lower()] for i in range(len(id2label))]
+        weights = np.array([w for w, _ in polarities], dtype=np.float32)
+        labels = np.array([label for _, label in polarities])
+        return weights, labels
+
+    def _warm_up(self) -> None:
+        """Passe à vide sur un lot factice de forme (BATCH_SIZE, MAX_TOKENS)."""
+        enc = self.pipe.tokenizer(
+            [""] * self.BATCH_SIZE,
+            truncation=True, max_length=self.MAX_TOKENS, padding="max_length", return_tensors="pt"
+        )
+        with torch.inference_mode():
+            self.pipe.model(**{k: v.to(self.device) for k, v in enc.items()})
+
+    def _pad_batch(self, batch: dict) -> dict:
+        """Complète un lot incomplet à BATCH_SIZE (en répétant sa dernière ligne) pour garder une forme fixe."""
+        missing = self.BATCH_SIZE - len(batch["input_ids"])
+        if missing <= 0:
+            return batch
+        return {k: torch.cat([v, v[-1:].expand(missing, -1)]) for k, v in batch.items()}
+
+    @staticmethod
+    def _select_device() -> tuple[torch.device, torch.dtype]:
+        """Choisit le périphérique et la précision du modèle PyTorch."""
+        if not torch.cuda.is_available():
+            return torch.device("cpu"), torch.float32
+        capability = torch.cuda.get_device_capability()
+        if capability >= (8, 0):
+            return torch.device("cuda", 0), torch.bfloat16
+        if capability >= (7, 0):
+            return torch.device("cuda", 0), torch.float16
+        return torch.device("cuda", 0), torch.float32
+
+    @staticmethod
+    def _load_onnx(onnx_dir: Path):
+        """Pipeline adossé à onnxruntime (CUDA si disponible, sinon CPU)."""
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        provider = (
+            "CUDAExecutionProvider"
+            if "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+            else "CPUExecutionProvider"
+        )
+        model = ORTModelForSequenceClassification.from_pretrained(onnx_dir, provider=provider)
+        tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
 
     def analyze(self, text: str) -> tuple[float, str]:
         """
@@ -27,46 +163,76 @@ class SentimentAnalyzer:
         - un score normalisé entre -1 (négatif) et 1 (positif)
         - un label ("négatif", "neutre", "positif")
         """
-        if not text or len(text.strip()) < 5:
-            return 0.0, "neutre"
+        scores, labels = self.analyze_batch([text])
+        return scores[0], labels[0]
 
-        try:
-            # Les modèles BERT ont une limite de longueur (souvent 512 tokens).
-            # On tronque le texte pour éviter les erreurs.
-            result = self.pipe(text[:512])[0]
-            
-            # Le résultat ressemble à : {'label': '1 star', 'score': 0.95}
-            label_star = result['label']  # ex: '1 star', '4 stars'
-            confidence = result['score']  # certitude de l'IA (0 à 1)
-
-            # --- CONVERSION DU SYSTÈME D'ÉTOILES EN POLARITÉ ---
-            # 1 star  = Très Négatif
-            # 2 stars = Négatif
-            # 3 stars = Neutre
-            # 4 stars = Positif
-            # 5 stars = Très Positif
-            
-            stars = int(label_star.split()[0]) # On récupère juste le chiffre
-            
-            # On mappe 1..5 vers -1..1
-            # 1 -> -1.0
-            # 2 -> -0.5
-            # 3 ->  0.0
-            # 4 -> +0.5
-            # 5 -> +1.0
-            normalized_score = (stars - 3) / 2.0
-
-            # Définition du label textuel pour ton interface
-            if stars <= 2:
-                final_label = "négatif"
-            elif stars == 3:
-                final_label = "neutre"
-            else:
-                final_label = "positif"
+    def analyze_batch(self, texts: list[str]) -> tuple[list[float], list[str]]:
+        """
+        Version vectorisée de `analyze` : un seul appel au modèle pour tous les textes.
+        Retourne deux listes alignées sur `texts` (scores, labels).
+        Les textes vides ou trop courts sont marqués "neutre" sans passer par BERT.
+        """
+        scores = [0.0] * len(texts)
+        labels = ["neutre"] * len(texts)
 
-            return normalized_score, final_label
+        # On ne passe par BERT que pour les textes absents du cache
+        indices, keys = [], []
+        for i, t in enumerate(texts):
+            if not t or len(t.strip()) < 5:
+                continue
+            # Le nom du modèle fait partie de la clé : changer de modèle invalide le cache
+            key = hashlib.blake2b(f"{MODEL_NAME}\n{t}".encode(), digest_size=16).hexdigest()
+            hit = self.cache.get(key)
+            if hit is not None:
+                scores[i], labels[i] = hit
+            else:
+                indices.append(i)
+                keys.append(key)
+        if not indices:
+            return scores, labels
 
+        try:
+            # Les modèles BERT ont une limite de longueur : on tronque en tokens (et non
+            # en caractères), 256 suffisent largement pour capter le ton d'un article.
+            enc = self.tokenizer(
+                [texts[i] for i in indices],
+                truncation=True, max_length=self.MAX_TOKENS, padding=self.padding, return_tensors="pt"
+            )
+            confidences, idxs = [], []
+            with torch.inference_mode():
+                for start in range(0, len(indices), self.BATCH_SIZE):
+                    batch = {k: v[start:start + self.BATCH_SIZE] for k, v in enc.items()}
+                    size = len(batch["input_ids"])
+                    if self.compiled:
+                        batch = self._pad_batch(batch)
+                    batch = {k: v.to(self.device) for k, v in batch.items()}
+                    logits = self.model(**batch).logits[:size]
+                    # Classe prédite et certitude du modèle (0 à 1), réduites tout de suite :
+                    # avec les CUDA graphs, l'appel suivant écrase les tampons de sortie.
+                    confidence, idx = logits.float().softmax(-1).max(-1)
+                    confidences.append(confidence.cpu())
+                    idxs.append(idx.cpu())
+            confidence, idx = torch.cat(confidences), torch.cat(idxs)
         except Exception as e:
             # En cas de pépin, on reste neutre
             print(f"Erreur analyse BERT : {e}")
-            return 0.0, "neutre"
\ No newline at end of file
+            return scores, labels
+
+        batch_scores, batch_labels = self._to_polarity(idx.numpy(), confidence.numpy())
+        for i, key, score, label in zip(indices, keys, batch_scores, batch_labels):
+            scores[i], labels[i] = score, label
+            self.cache.set(key, (score, label))
+        return scores, labels
+
+    def _to_polarity(self, idx: np.ndarray, confidence: np.ndarray) -> tuple[list[float], list[str]]:
+        """Convertit les classes prédites en (scores, labels), sans boucle Python."""
+        # Score entre -1 et 1 : polarité de la classe pondérée par la certitude du modèle
+        # negative -> -confiance
+        # neutral  ->  0.0
+        # positive -> +confiance
+        normalized_scores = self._weights[idx] * confidence
+
+        # Définition du label textuel pour ton interface (table de correspondance)
+        final_labels = self._labels[idx]
+
+        return normalized_scores.tolist(), final_labels.tolist()
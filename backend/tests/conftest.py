@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les services s'importent entre eux à plat (`from sentiment_analyzer import ...`)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "services"))
@@ -0,0 +1,321 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+import pytest
+from lxml import etree
+
+import scraper
+from scraper import ArticleData, RSSScraper
+
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+  <channel>
+    <item>
+      <title> Titre RSS </title>
+      <link>https://exemple.fr/a</link>
+      <pubDate>Tue, 14 Oct 2025 08:30:00 +0200</pubDate>
+      <description>&lt;p&gt;Résumé&lt;/p&gt;</description>
+      <content:encoded>&lt;p&gt;Texte complet&lt;/p&gt;</content:encoded>
+    </item>
+  </channel>
+</rss>""".encode()
+
+ATOM = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <title>Titre Atom</title>
+    <link rel="self" href="https://exemple.fr/self"/>
+    <link href="https://exemple.fr/b"/>
+    <updated>2025-10-14T06:30:00Z</updated>
+    <summary>Résumé Atom</summary>
+  </entry>
+</feed>""".encode()
+
+# Flux SPIP (reporterre, diploweb) : items datés par dc:date
+SPIP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <item>
+      <title>Titre SPIP</title>
+      <link>https://exemple.fr/spip</link>
+      <dc:date>2025-10-14T06:30:00Z</dc:date>
+    </item>
+  </channel>
+</rss>"""
+
+RSS1 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns="http://purl.org/rss/1.0/"
+         xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel rdf:about="https://exemple.fr/">
+    <title>Canal</title>
+  </channel>
+  <item rdf:about="https://exemple.fr/rdf">
+    <title>Titre RDF</title>
+    <link>https://exemple.fr/rdf</link>
+    <description>Description RDF</description>
+    <dc:date>2025-10-14T08:30:00+02:00</dc:date>
+  </item>
+</rdf:RDF>"""
+
+
+def test_parse_rss_item():
+    [entry] = RSSScraper._parse_rss(RSS)
+    assert entry == {
+        "title": "Titre RSS",
+        "link": "https://exemple.fr/a",
+        "published": 1760423400,
+        "description": "<p>Résumé</p>",
+        "content": "<p>Texte complet</p>",
+    }
+
+
+def test_parse_atom_entry():
+    [entry] = RSSScraper._parse_rss(ATOM)
+    assert entry["title"] == "Titre Atom"
+    assert entry["link"] == "https://exemple.fr/b"
+    assert entry["published"] == 1760423400
+    assert entry["description"] == "Résumé Atom"
+    assert entry["content"] == ""
+
+
+def test_parse_rss_dc_date_fallback():
+    [entry] = RSSScraper._parse_rss(SPIP)
+    assert entry["title"] == "Titre SPIP"
+    assert entry["published"] == 1760423400
+
+
+def test_parse_rss1_rdf_item():
+    [entry] = RSSScraper._parse_rss(RSS1)
+    assert entry["title"] == "Titre RDF"
+    assert entry["link"] == "https://exemple.fr/rdf"
+    assert entry["description"] == "Description RDF"
+    assert entry["published"] == 1760423400
+
+
+@pytest.fixture
+def rss_scraper(tmp_path, monkeypatch):
+    # Pas de modèle : les tests qui en ont besoin posent leur propre analyseur
+    monkeypatch.setattr(scraper, "SentimentAnalyzer", lambda: None)
+    return RSSScraper(text_cache_dir=str(tmp_path / "cache"))
+
+
+class FakeAnalyzer:
+    """Score = position du texte dans le lot, pour vérifier la redistribution par sujet."""
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze_batch(self, texts):
+        self.calls.append(list(texts))
+        return [float(i) for i in range(len(texts))], [f"label {t}" for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_scrape_all_maps_scores_back_to_topics(rss_scraper, monkeypatch):
+    rows = {
+        "tech": [("T1", "https://t/1", "Flux", 0, "texte", "tech 1"),
+                 ("T2", "https://t/2", "Flux", 0, "texte", "tech 2")],
+        "sport": [],
+        "monde": [("M1", "https://m/1", "Flux", 0, "texte", "monde 1")],
+    }
+
+    async def fake_collect(topic):
+        return rows[topic]
+
+    monkeypatch.setattr(rss_scraper, "_collect_topic", fake_collect)
+    rss_scraper.analyzer = FakeAnalyzer()
+    done = []
+
+    results = await rss_scraper.scrape_all(["tech", "sport", "monde"], on_topic_done=done.append)
+
+    # Un seul appel au modèle, pour tous les sujets
+    assert rss_scraper.analyzer.calls == [["tech 1", "tech 2", "monde 1"]]
+    assert sorted(done) == ["monde", "sport", "tech"]
+    assert [(a.title, a.topic, a.sentiment_score, a.sentiment_label) for a in results["tech"]] == [
+        ("T1", "tech", 0.0, "label tech 1"),
+        ("T2", "tech", 1.0, "label tech 2"),
+    ]
+    assert results["sport"] == []
+    assert [(a.title, a.sentiment_score, a.sentiment_label) for a in results["monde"]] == [
+        ("M1", 2.0, "label monde 1"),
+    ]
+
+
+def make_entry(title="Titre", description="", content="", link="https://exemple.fr/a"):
+    return {"title": title, "link": link, "description": description, "content": content, "published": 0}
+
+
+@pytest.fixture
+def fetched(rss_scraper, monkeypatch):
+    """Remplace le téléchargement de la page et garde les URL demandées."""
+    urls = []
+
+    async def fake_fetch(url):
+        urls.append(url)
+        return "texte de la page"
+
+    monkeypatch.setattr(rss_scraper, "fetch_article_text", fake_fetch)
+    return urls
+
+
+@pytest.mark.asyncio
+async def test_entry_text_uses_long_inline_content(rss_scraper, fetched):
+    body = "mot " * RSSScraper.INLINE_TEXT_MIN
+    text = await rss_scraper._entry_text(make_entry(content=f"<p>{body}</p>"))
+    assert text == body.strip()
+    assert fetched == []
+
+
+@pytest.mark.asyncio
+async def test_entry_text_fetches_page_when_inline_is_short(rss_scraper, fetched):
+    entry = make_entry(description="<p>Un résumé bien trop court pour être analysé seul</p>")
+    assert await rss_scraper._entry_text(entry) == "texte de la page"
+    assert fetched == ["https://exemple.fr/a"]
+
+
+@pytest.mark.asyncio
+async def test_entry_text_skips_thin_entries(rss_scraper, fetched):
+    assert await rss_scraper._entry_text(make_entry(title="Brève", description="<p>Court</p>")) is None
+    assert fetched == []
+
+
+@pytest.mark.asyncio
+async def test_entry_text_keeps_short_entries_with_content(rss_scraper, fetched):
+    # Un contenu embarqué, même bref, n'est jamais considéré comme maigre
+    assert await rss_scraper._entry_text(make_entry(title="Brève", content="<p>Court</p>")) == "texte de la page"
+    assert fetched == ["https://exemple.fr/a"]
+
+
+def test_extract_text_selector_priority(rss_scraper):
+    html = b"""<html><body>
+      <div class="content">Barre laterale</div>
+      <article><p>Premier   paragraphe</p><script>var x = 1;</script><p>Second</p></article>
+    </body></html>"""
+    assert rss_scraper._extract_text(html) == "Premier paragraphe Second"
+
+
+def test_extract_text_falls_back_to_div(rss_scraper):
+    html = b'<html><body><nav>Menu</nav><div id="content"><p>Corps</p></div></body></html>'
+    assert rss_scraper._extract_text(html) == "Corps"
+
+
+def test_extract_text_no_match(rss_scraper):
+    assert rss_scraper._extract_text(b"<html><body><p>Rien</p></body></html>") == ""
+
+
+def test_strip_tags(rss_scraper):
+    fragment = "<p>Un <b>résumé</b></p><style>p {}</style>\n<p>en deux</p>"
+    assert rss_scraper._strip_tags(fragment) == "Un résumé en deux"
+
+
+def test_extract_text_xhtml_declaration(rss_scraper):
+    html = """<?xml version="1.0" encoding="iso-8859-1"?>
+<html xmlns="http://www.w3.org/1999/xhtml"><body><article>Été à Noël</article></body></html>""".encode("iso-8859-1")
+    assert rss_scraper._extract_text(html) == "Été à Noël"
+
+
+def test_extract_text_header_charset(rss_scraper):
+    html = "<html><body><article>Crème brûlée</article></body></html>".encode("cp1252")
+    assert rss_scraper._extract_text(html, "windows-1252") == "Crème brûlée"
+
+
+def serve(rss_scraper, content_type, chunks):
+    """Branche la session sur un transport factice qui sert `chunks` ; renvoie les morceaux lus."""
+    sent = []
+
+    async def body():
+        for chunk in chunks:
+            sent.append(chunk)
+            yield chunk
+
+    def handler(request):
+        return httpx.Response(200, headers={"Content-Type": content_type}, content=body())
+
+    rss_scraper.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    rss_scraper._semaphore = asyncio.Semaphore(1)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_fetch_html_caps_body_size(rss_scraper):
+    chunks = [b"x" * 16384] * 64
+    sent = serve(rss_scraper, "text/html", chunks)
+    html, encoding = await rss_scraper._fetch_html("https://exemple.fr/a")
+    assert RSSScraper.MAX_HTML_BYTES < len(html) <= RSSScraper.MAX_HTML_BYTES + 65536
+    assert len(sent) < len(chunks)
+    assert encoding is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_html_skips_non_html(rss_scraper):
+    sent = serve(rss_scraper, "application/pdf", [b"%PDF-1.4"] * 4)
+    assert await rss_scraper._fetch_html("https://exemple.fr/doc.pdf") == (b"", None)
+    assert sent == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_html_returns_header_charset(rss_scraper):
+    serve(rss_scraper, "text/html; charset=iso-8859-1", [b"<html></html>"])
+    assert await rss_scraper._fetch_html("https://exemple.fr/a") == (b"<html></html>", "iso-8859-1")
+
+
+def test_parse_rss_recovers_malformed_feed():
+    # « & » non échappé et balises jamais refermées, fréquents sur les flux réels
+    xml = b"<rss><channel><item><title>Pommes & poires</title><link>https://exemple.fr/p</link></item>"
+    [entry] = RSSScraper._parse_rss(xml)
+    assert entry["link"] == "https://exemple.fr/p"
+    assert entry["title"].startswith("Pommes")
+
+
+def test_parse_rss_unrecoverable():
+    assert RSSScraper._parse_rss(b"pas du xml") == []
+    # Corps vide : l'erreur remonte et _fetch_feed écarte le flux
+    with pytest.raises(etree.XMLSyntaxError):
+        RSSScraper._parse_rss(b"")
+
+
+def test_parse_rss_ignores_external_entities(tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("MOT-DE-PASSE")
+    xml = f"""<?xml version="1.0"?>
+<!DOCTYPE rss [<!ENTITY xxe SYSTEM "{secret.as_uri()}">]>
+<rss><channel><item><title>&xxe;</title><link>https://exemple.fr/x</link></item></channel></rss>""".encode()
+    [entry] = RSSScraper._parse_rss(xml)
+    assert "MOT-DE-PASSE" not in entry["title"]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Tue, 14 Oct 2025 08:30:00 +0200", 1760423400),
+    ("2025-10-14T06:30:00Z", 1760423400),
+    ("2025-10-14T08:30:00+02:00", 1760423400),
+    ("2025-10-14T06:30:00", 1760423400),  # sans fuseau : UTC
+    (None, 0),
+    ("", 0),
+    ("pas une date", 0),
+])
+def test_parse_ts(value, expected):
+    assert RSSScraper._parse_ts(value) == expected
+
+
+def test_published_date_is_built_from_ts():
+    article = ArticleData("Titre", "https://exemple.fr/a", "Flux", "tech", published_ts=1760423400)
+    assert article.published_date == datetime(2025, 10, 14, 6, 30)
+    assert ArticleData("Titre", "https://exemple.fr/a", "Flux", "tech").published_date is None
+
+
+def test_extract_text_is_thread_safe(rss_scraper):
+    # Parsers propres à chaque thread : pas d'état partagé entre pages ni entre encodages
+    encodings = ["utf-8", "iso-8859-1", "windows-1252", "utf-16"] * 25
+    pages = [
+        (f"<html><body><article>Page {i} é</article></body></html>".encode(enc), enc)
+        for i, enc in enumerate(encodings)
+    ]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        texts = list(pool.map(lambda page: rss_scraper._extract_text(*page), pages))
+    assert texts == [f"Page {i} é" for i in range(len(pages))]
+    # Le parser d'un thread est réutilisé d'une page à l'autre
+    assert rss_scraper._html_parser("utf-8") is rss_scraper._html_parser("utf-8")
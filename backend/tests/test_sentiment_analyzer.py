@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+
+import diskcache
+import numpy as np
+import pytest
+import torch
+
+import sentiment_analyzer
+from sentiment_analyzer import SentimentAnalyzer
+
+
+def make_analyzer(id2label: dict) -> SentimentAnalyzer:
+    # Tables de correspondance seules, sans charger le modèle
+    analyzer = SentimentAnalyzer.__new__(SentimentAnalyzer)
+    analyzer._weights, analyzer._labels = SentimentAnalyzer._build_tables(id2label)
+    return analyzer
+
+
+def test_build_tables_follows_model_class_order():
+    weights, labels = SentimentAnalyzer._build_tables({0: "positive", 1: "NEUTRAL", 2: "negative"})
+    assert weights.tolist() == [1.0, 0.0, -1.0]
+    assert labels.tolist() == ["positif", "neutre", "négatif"]
+
+
+def test_to_polarity():
+    analyzer = make_analyzer({0: "positive", 1: "neutral", 2: "negative"})
+    scores, labels = analyzer._to_polarity(
+        np.array([0, 1, 2]), np.array([0.5, 0.9, 0.75], dtype=np.float32)
+    )
+    assert scores == [0.5, 0.0, -0.75]
+    assert labels == ["positif", "neutre", "négatif"]
+
+
+def test_to_polarity_returns_python_types():
+    analyzer = make_analyzer({0: "negative", 1: "neutral", 2: "positive"})
+    scores, labels = analyzer._to_polarity(np.array([2]), np.array([1.0], dtype=np.float32))
+    assert type(scores[0]) is float
+    assert type(labels[0]) is str
+    assert (scores, labels) == ([1.0], ["positif"])
+
+
+ID2LABEL = {0: "negative", 1: "neutral", 2: "positive"}
+# Certitude renvoyée par FakeModel pour la classe prédite
+CONFIDENCE = torch.tensor([10.0, 0.0, 0.0]).softmax(-1)[0].item()
+
+
+class FakeTokenizer:
+    """Encode chaque texte par la classe attendue (un seul « token » par texte)."""
+
+    def __init__(self, classes: dict):
+        self.classes = classes
+
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": torch.tensor([[self.classes[t]] for t in texts])}
+
+
+class FakeModel:
+    """Renvoie des logits très marqués pour la classe encodée ; garde la taille de chaque lot."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, input_ids):
+        self.batch_sizes.append(len(input_ids))
+        return SimpleNamespace(logits=torch.nn.functional.one_hot(input_ids[:, 0], 3).float() * 10)
+
+
+def make_model_analyzer(cache_dir, classes: dict, compiled: bool = False) -> SentimentAnalyzer:
+    analyzer = make_analyzer(ID2LABEL)
+    analyzer.cache = diskcache.Cache(str(cache_dir))
+    analyzer.tokenizer = FakeTokenizer(classes)
+    analyzer.model = FakeModel()
+    analyzer.device = torch.device("cpu")
+    analyzer.compiled = compiled
+    analyzer.padding = "max_length" if compiled else "longest"
+    return analyzer
+
+
+def test_analyze_batch_keeps_order_and_skips_short_texts(tmp_path):
+    analyzer = make_model_analyzer(tmp_path, {"un article positif": 2, "un article négatif": 0})
+    scores, labels = analyzer.analyze_batch(["", "un article positif", "ok", "un article négatif"])
+    assert labels == ["neutre", "positif", "neutre", "négatif"]
+    assert scores == pytest.approx([0.0, CONFIDENCE, 0.0, -CONFIDENCE])
+    # Un seul lot, sans les textes trop courts
+    assert analyzer.model.batch_sizes == [2]
+
+
+def test_analyze_batch_splits_into_batches(tmp_path):
+    texts = [f"article numéro {i}" for i in range(20)]
+    analyzer = make_model_analyzer(tmp_path, {t: i % 3 for i, t in enumerate(texts)})
+    _, labels = analyzer.analyze_batch(texts)
+    assert analyzer.model.batch_sizes == [SentimentAnalyzer.BATCH_SIZE, 4]
+    assert labels == [["négatif", "neutre", "positif"][i % 3] for i in range(20)]
+
+
+def test_analyze_single_text(tmp_path):
+    analyzer = make_model_analyzer(tmp_path, {"un article positif": 2})
+    assert analyzer.analyze("un article positif") == (pytest.approx(CONFIDENCE), "positif")
+    assert analyzer.analyze("") == (0.0, "neutre")
+
+
+def test_pad_batch_repeats_last_row():
+    analyzer = SentimentAnalyzer.__new__(SentimentAnalyzer)
+    batch = {
+        "input_ids": torch.arange(6).view(3, 2),
+        "attention_mask": torch.ones(3, 2, dtype=torch.long),
+    }
+    padded = analyzer._pad_batch(batch)
+    for key, value in batch.items():
+        assert padded[key].shape == (SentimentAnalyzer.BATCH_SIZE, 2)
+        assert torch.equal(padded[key][:3], value)
+        assert torch.equal(padded[key][3:], value[-1:].expand(SentimentAnalyzer.BATCH_SIZE - 3, -1))
+
+
+def test_pad_batch_keeps_full_batch():
+    analyzer = SentimentAnalyzer.__new__(SentimentAnalyzer)
+    batch = {"input_ids": torch.zeros(SentimentAnalyzer.BATCH_SIZE, 2, dtype=torch.long)}
+    assert analyzer._pad_batch(batch) is batch
+
+
+def test_compiled_model_gets_fixed_batches_but_only_real_results(tmp_path):
+    texts = ["un article positif", "un article négatif", "un article neutre"]
+    analyzer = make_model_analyzer(tmp_path, dict(zip(texts, (2, 0, 1))), compiled=True)
+    scores, labels = analyzer.analyze_batch(texts)
+    assert analyzer.model.batch_sizes == [SentimentAnalyzer.BATCH_SIZE]
+    assert labels == ["positif", "négatif", "neutre"]
+    assert scores == pytest.approx([CONFIDENCE, -CONFIDENCE, 0.0])
+
+
+def test_analyze_batch_reads_cached_results(tmp_path):
+    classes = {"un article positif": 2, "un article négatif": 0}
+    analyzer = make_model_analyzer(tmp_path, classes)
+    first = analyzer.analyze_batch(["un article positif"])
+
+    # Seul le texte absent du cache passe par le modèle
+    second = analyzer.analyze_batch(["un article négatif", "un article positif"])
+    assert analyzer.model.batch_sizes == [1, 1]
+    assert second == ([-CONFIDENCE, first[0][0]], ["négatif", "positif"])
+
+    # Le cache est persistant : une nouvelle instance ne rappelle pas le modèle
+    reopened = make_model_analyzer(tmp_path, classes)
+    assert reopened.analyze_batch(["un article positif", "un article négatif"]) == (
+        [first[0][0], -CONFIDENCE],
+        ["positif", "négatif"],
+    )
+    assert reopened.model.batch_sizes == []
+
+
+def test_cache_key_depends_on_model_name(tmp_path, monkeypatch):
+    analyzer = make_model_analyzer(tmp_path, {"un article positif": 2})
+    analyzer.analyze_batch(["un article positif"])
+    monkeypatch.setattr(sentiment_analyzer, "MODEL_NAME", "autre/modele")
+    analyzer.analyze_batch(["un article positif"])
+    assert analyzer.model.batch_sizes == [1, 1]
@@ -0,0 +1,22 @@
+"""
+Export unique du modèle de sentiment au format ONNX.
+
+À lancer une fois (depuis la racine du dépôt), après avoir installé la dépendance
+optionnelle notée dans backend/requirements.txt :
+    pip install "optimum[onnxruntime]==1.16.1"
+    python scripts/export_sentiment_onnx.py
+
+Le dossier produit (backend/sentiment_onnx) est ensuite chargé par
+SentimentAnalyzer via onnxruntime, sans téléchargement au démarrage.
+"""
+from pathlib import Path
+
+from optimum.exporters.onnx import main_export
+
+MODEL_NAME = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+OUTPUT_DIR = Path(__file__).resolve().parents[1] / "backend" / "sentiment_onnx"
+
+if __name__ == "__main__":
+    print(f"Export de {MODEL_NAME} vers {OUTPUT_DIR}...")
+    main_export(MODEL_NAME, output=OUTPUT_DIR, task="text-classification")
+    print("Export terminé.")